@@ -5,54 +5,210 @@
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse, RedirectResponse
-from pydantic import BaseModel
-from openai import AsyncOpenAI
+from fastapi.responses import ORJSONResponse, RedirectResponse, StreamingResponse
+from pydantic import BaseModel, field_validator
+from openai import AsyncOpenAI, APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+from contextlib import asynccontextmanager
 import asyncio
+import httpx
 import os
 from dotenv import load_dotenv
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional, Tuple
+from cachetools import LRUCache, TTLCache
+import aiofiles
+import orjson
+import hashlib
+import copy
 import uuid
+import random
 import time
-import json
+import re
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
 
 # Load environment variables
 load_dotenv()
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the log writer, query janitor and optimize batcher for the app's lifetime; flush logs and release the connection pool on shutdown"""
+    writer = asyncio.create_task(log_writer())
+    janitor = asyncio.create_task(expire_queries())
+    batcher = asyncio.create_task(optimize_batcher.run())
+    yield
+    await log_queue.join()  # Flush pending log entries before exiting
+    writer.cancel()
+    janitor.cancel()
+    batcher.cancel()
+    await http_client.aclose()
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # ============================================
 # CONFIGURATION
 # ============================================
 
-# Global dictionary to track query status for real-time updates
+# Queries are kept for an hour after they start, then evicted (oldest first if the cap is hit)
+QUERY_TTL = 3600  # seconds
+MAX_TRACKED_QUERIES = 10_000
+
+# How often the janitor drops expired queries (TTLCache only evicts lazily on writes)
+JANITOR_INTERVAL = 60  # seconds
+
+# Query status for real-time updates
 # Format: {request_id: {models: {model_name: {status, start_time, end_time, error}}, aggregation_status}}
-query_status = {}
+query_status = TTLCache(maxsize=MAX_TRACKED_QUERIES, ttl=QUERY_TTL)
 
-# Global dictionary to store completed query results
+# Completed query results
 # Format: {request_id: {aggregated, individual}}
-query_results = {}
+query_results = TTLCache(maxsize=MAX_TRACKED_QUERIES, ttl=QUERY_TTL)
+
+# Live event subscribers for /api/stream (status snapshots and the final result)
+# Format: {request_id: [asyncio.Queue of (event, data), one per connected client]}
+query_listeners = {}
+
+# Seconds between SSE keepalive comments so proxies don't drop idle streams
+STREAM_KEEPALIVE = 15
+
+# Exact-match cache for model and aggregator completions
+# Format: {sha256 of request inputs: model result dict or aggregated text}
+# Repeated prompts (e.g. "latest news" queries) skip the upstream call until the entry expires
+RESPONSE_CACHE_TTL = 300  # seconds
+response_cache = TTLCache(maxsize=1000, ttl=RESPONSE_CACHE_TTL)
+
+# Final results of whole queries, so a repeated prompt + model set + aggregator skips the fan-out entirely
+# Format: {query key: (status snapshot, result)}
+query_cache = TTLCache(maxsize=256, ttl=RESPONSE_CACHE_TTL)
+
+# Queries currently running, so identical simultaneous requests share one upstream fan-out
+# Format: {query key: (leader request_id, asyncio.Future resolved with the leader's result)}
+inflight_queries = {}
+
+# Requests coalesced onto a running query, which receive its status events too
+# Format: {leader request_id: [follower request_ids]}
+query_followers = {}
+
+# Optimizer results for repeated prompts on the same day
+# Format: {(model, prompt, today): (optimized, tokens)}
+optimization_cache = LRUCache(maxsize=1024)
+
+# Today's date as injected into optimizer prompts, re-formatted only when the local date changes
+# Format: {"day": local datetime.date, "date": "November 10, 2025"}
+today_cache = {"day": None, "date": None}
+
+# /api/optimize requests arriving within this window share one optimizer call (up to the batch size)
+OPTIMIZE_BATCH_WINDOW = 0.05  # seconds
+OPTIMIZE_BATCH_SIZE = 8
+
+# Start the aggregator once this many models have succeeded (capped at the number selected)
+# Models that finish later still appear in the individual responses
+EARLY_AGGREGATION_MIN = 3
+
+# If the quorum hasn't arrived by now, synthesize whatever has succeeded (seconds after the query starts)
+SOFT_DEADLINE = 45
+
+# Developer logs (JSON Lines - one entry per line, append-only)
+QUERY_LOG_FILE = Path("query_log.jsonl")
+OPTIMIZATION_LOG_FILE = Path("optimization_log.jsonl")
+
+# Pending log writes as (log_file, entry), drained by log_writer() so requests never wait on disk
+log_queue: asyncio.Queue = asyncio.Queue()
+
+# Enable CORS for explicit origins only (comma-separated CORS_ORIGINS env var)
+# The bundled frontend is same-origin; list other origins only if a separate UI calls the API
+CORS_ORIGINS = [o.strip() for o in os.getenv("CORS_ORIGINS", "http://localhost:8000").split(",") if o.strip()]
 
-# Enable CORS
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=CORS_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],
+    allow_headers=["Content-Type"],
 )
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Browser cache lifetime for static assets (seconds) - ETag/Last-Modified still revalidate after expiry
+STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", "600"))
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles with a Cache-Control header so repeat visits don't hit the event loop for assets"""
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers.setdefault("Cache-Control", f"public, max-age={STATIC_MAX_AGE}")
+        return response
+
+# Mount static files (in production, serve /static/ from nginx - see README)
+app.mount("/static", CachedStaticFiles(directory="static"), name="static")
+
+# Shared HTTP session for every OpenRouter call (model queries, aggregation, optimization)
+# HTTP/2 lets the parallel model calls multiplex over one connection, and the long
+# keepalive keeps that connection warm between requests so we skip the TCP+TLS handshake
+http_client = httpx.AsyncClient(
+    http2=True,
+    timeout=httpx.Timeout(120.0, connect=5.0),
+    limits=httpx.Limits(
+        max_keepalive_connections=64,
+        max_connections=128,
+        keepalive_expiry=300.0
+    )
+)
 
 # Initialize OpenRouter client
 client = AsyncOpenAI(
     base_url="https://openrouter.ai/api/v1",
-    api_key=os.getenv("OPENROUTER_API_KEY")
+    api_key=os.getenv("OPENROUTER_API_KEY"),
+    http_client=http_client,
+    max_retries=5  # SDK backs off and retries on 429s and transient connection errors
 )
 
+# Fan-out calls skip the SDK's retries (its timeout applies per attempt, stretching the 120s budget
+# several times over) and retry in create_completion instead, within the model's remaining time
+fanout_client = client.with_options(max_retries=0)
+
+# Transient failures (429, 5xx, dropped connections) are retried with capped exponential backoff + jitter
+RETRY_ATTEMPTS = 3
+RETRY_MAX_DELAY = 10.0  # seconds, unless Retry-After asks for longer
+
+# Cap on in-flight OpenRouter calls across all users (each /api/chat fans out to 5 models + 1 aggregator)
+UPSTREAM_SEM = asyncio.Semaphore(int(os.getenv("MAX_UPSTREAM_CONCURRENCY", "32")))
+
+# Per-model concurrency: starts at MODEL_CONCURRENCY, halves on 429s, grows back while latency stays healthy
+MODEL_CONCURRENCY = int(os.getenv("MODEL_CONCURRENCY", "8"))
+MAX_MODEL_CONCURRENCY = 16
+LATENCY_TOLERANCE = 2.0  # Grow only while latency is within this multiple of the fastest seen
+
+class AdaptiveLimiter:
+    """Concurrency cap for one upstream model (AIMD on 429s, Vegas-style latency check before growing)"""
+
+    def __init__(self, limit: int = MODEL_CONCURRENCY):
+        self.limit = float(limit)
+        self.in_flight = 0
+        self.min_latency = None
+        self._cond = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def __aexit__(self, *exc):
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self, latency: float) -> None:
+        """Add one permit per full window of healthy responses"""
+        if self.min_latency is None or latency < self.min_latency:
+            self.min_latency = latency
+        if latency <= self.min_latency * LATENCY_TOLERANCE:
+            self.limit = min(MAX_MODEL_CONCURRENCY, self.limit + 1 / self.limit)
+
+    def on_rate_limit(self) -> None:
+        """Halve the permits after the upstream pushed back"""
+        self.limit = max(1.0, self.limit / 2)
+
+# Format: {model: AdaptiveLimiter}, created on first use
+model_limiters = {}
+
 # Available models for initial prompts (verified working with :online web search)
 AVAILABLE_MODELS = [
     "openai/gpt-4o:online",
@@ -62,12 +218,146 @@ AVAILABLE_MODELS = [
     "google/gemini-2.0-flash-001:online"
 ]
 
+# Set view of AVAILABLE_MODELS for O(1) request validation (the list keeps display order)
+AVAILABLE_MODELS_SET = frozenset(AVAILABLE_MODELS)
+
 # Available aggregator models (can use DeepSeek for synthesis only)
 AGGREGATOR_MODELS = AVAILABLE_MODELS + ["deepseek/deepseek-chat:online"]
+AGGREGATOR_MODELS_SET = frozenset(AGGREGATOR_MODELS)
 
 # Aggregation model (default with web search enabled)
 AGGREGATOR_MODEL = "anthropic/claude-sonnet-4.5:online"
 
+# Prompt optimizer model (NO :online suffix - we don't need web search, date comes from the system)
+OPTIMIZER_MODEL = "anthropic/claude-3.5-haiku"
+
+# Per-model settings, looked up once per call
+# timeout: seconds before the call is abandoned (most complete in ~10 seconds)
+# note: context hint for models with special capabilities, shown to the aggregator
+DEFAULT_MODEL_TIMEOUT = 120.0
+MODEL_META = {
+    "openai/gpt-4o:online": {"timeout": 120.0, "note": ""},
+    "anthropic/claude-sonnet-4.5:online": {"timeout": 120.0, "note": " (strong reasoning, detailed analysis)"},
+    "perplexity/sonar-pro": {"timeout": 120.0, "note": " (native web search with citations)"},
+    "x-ai/grok-4:online": {"timeout": 120.0, "note": " (real-time X/Twitter access)"},
+    "google/gemini-2.0-flash-001:online": {"timeout": 120.0, "note": " (multimodal capabilities, Google search)"}
+}
+
+# ============================================
+# PROMPT TEMPLATES
+# ============================================
+
+# System message shared by every fan-out model call (identical across all 5 calls and all requests)
+QUERY_SYSTEM_PROMPT = "Be concise and data-focused. Omit preambles, disclaimers, and process explanations. Start directly with key findings using bullet points. Cite sources inline (e.g., 'per ESPN') without full URLs. Target 300-500 words for simple queries, expand as needed for complex questions."
+
+# Static synthesis instructions sent to the aggregator as the system message
+# Kept byte-identical across requests so providers with prompt caching can reuse the prefix
+AGGREGATION_SYSTEM_PROMPT = """Synthesize these AI model responses. They already performed web searches - use only their findings.
+
+Output format:
+
+## KEY CONSENSUS
+2-3 bullet points max of baseline facts most models agree on. Include numbers, dates, names.
+
+## UNIQUE INSIGHTS BY MODEL
+What each model uniquely contributed (exclusive data, novel angles, sources only 1-2 models found):
+
+**From GPT-4o (Model 1):** [List unique findings, or "No unique insights" if overlaps with others]
+
+**From Claude (Model 2):** [List unique findings, prioritize detailed analysis and exclusive data points]
+
+**From Perplexity (Model 3):** [List unique findings, prioritize citation quality and exclusive sources]
+
+**From Grok (Model 4):** [List unique findings, prioritize X/Twitter posts and real-time social data]
+
+**From Gemini (Model 5):** [List unique findings, prioritize Google search exclusives]
+
+## WATCH FOR
+**Next 24-72 Hours:**
+- [Immediate developments, breaking news to monitor, upcoming announcements]
+- [Specific events with dates/times]
+
+**Next 1-4 Weeks:**
+- [Short-term trends to track, upcoming decisions/votes/releases]
+- [Key metrics or indicators to monitor]
+- [People, organizations, or events to follow]
+
+## SOURCES
+Key sources cited above:
+[1] Source name
+[2] Source name
+
+Rules: No preambles. Start with ## KEY CONSENSUS. Show model attribution to highlight each model's unique value."""
+
+# Per-request part of the synthesis prompt (filled with str.format once per request)
+AGGREGATION_TEMPLATE = """Original Query: {query}
+
+Model Responses:
+{formatted_responses}"""
+
+# Prompt rewrite instructions for /api/optimize (filled with today's date and the user's prompt)
+OPTIMIZATION_TEMPLATE = """You are a prompt optimization assistant for a multi-model AI research tool. The tool queries 5 AI models in parallel (with web search enabled) and synthesizes their responses.
+
+IMPORTANT CONTEXT:
+- Today's actual date is: {today}
+- The research models will do web searches, not you
+- Your job is to optimize the prompt structure, not to search for information
+
+USER'S ORIGINAL PROMPT:
+{prompt}
+
+TASK: Rewrite this prompt to get maximum value from web-enabled AI models. Apply these principles:
+
+1. FIX ERRORS: Correct any typos or grammatical mistakes
+
+2. ADD STRUCTURE: Break complex queries into numbered sections (e.g., 1. X, 2. Y, 3. Z)
+
+3. INCREASE SPECIFICITY:
+   - For CURRENT EVENTS (e.g., "latest", "current", "today", "recent news", ongoing situations):
+     Add "as of {today}" to the prompt
+   - For HISTORICAL QUERIES (e.g., "2008 crisis", "World War II", queries about past events with dates):
+     Keep the historical timeframe, DO NOT add current dates
+   - For queries asking to "compare past to present", add {today} only for the present-day portion
+   - Name specific companies, people, metrics instead of generic terms
+   - Request quantifiable data (percentages, dollar amounts, counts)
+
+4. DEMAND SOURCES: Add "Cite sources with links" or "Provide specific sources"
+
+5. GUIDE OUTPUT: Specify what format/details you want (timelines, predictions, comparisons)
+
+CRITICAL RULES:
+- Determine if this is current/historical based on keywords in the prompt (don't search, just analyze the text)
+- Only add {today} for genuinely current/ongoing events
+- Keep the core intent and topic the same
+- Don't make it overly long (aim for 3-8 lines for simple queries, longer OK for complex multi-part questions)
+- Don't add unnecessary complexity if the original is already clear
+- If the original is already well-structured, make minimal changes
+
+OUTPUT: Return ONLY the optimized prompt text, no explanations or meta-commentary.
+
+EXAMPLE BAD OUTPUT (do NOT do this):
+"I'll analyze this prompt... Based on the keywords, here's the optimized version: [prompt]"
+
+EXAMPLE GOOD OUTPUT (do this):
+"[Just the optimized prompt with no preamble or explanation]"
+"""
+
+# Several prompts in one optimizer call: same rules, numbered JSON-quoted inputs, JSON array out
+OPTIMIZATION_BATCH_TEMPLATE = OPTIMIZATION_TEMPLATE.replace(
+    "USER'S ORIGINAL PROMPT:\n{prompt}",
+    "USER'S ORIGINAL PROMPTS (each is separate - optimize every one independently):\n{prompts}"
+) + """
+BATCH OUTPUT: Return a JSON array of exactly {count} strings - the optimized prompts, in the same order as the numbered originals. Output only the JSON array.
+"""
+
+# Meta-commentary stripped from optimizer output in a single pass: a line containing one of the phrases,
+# plus the blank or indented lines that follow it, plus one trailing newline
+PREAMBLE_RE = re.compile(
+    r"^[^\n]*(?:i'll first|i'll optimize|based on|rationale for|here's (?:the|an) optimized|the prompt provides)[^\n]*"
+    r"(?:\n(?: [^\n]*|[^\S\n]*)(?=\n|\Z))*\n?",
+    re.IGNORECASE | re.MULTILINE
+)
+
 # ============================================
 # DATA MODELS
 # ============================================
@@ -75,7 +365,25 @@ AGGREGATOR_MODEL = "anthropic/claude-sonnet-4.5:online"
 class ChatRequest(BaseModel):
     prompt: str
     models: List[str]
-    aggregator: str = "anthropic/claude-sonnet-4.5"  # Default aggregator
+    aggregator: str = AGGREGATOR_MODEL  # Default aggregator
+
+    # Invalid selections are rejected with a 422 while the body is parsed, before any handler code runs
+    @field_validator("models")
+    @classmethod
+    def check_models(cls, models: List[str]) -> List[str]:
+        if not models:
+            raise ValueError("At least one model must be selected")
+        invalid_models = [m for m in models if m not in AVAILABLE_MODELS_SET]
+        if invalid_models:
+            raise ValueError(f"Invalid models: {invalid_models}")
+        return models
+
+    @field_validator("aggregator")
+    @classmethod
+    def check_aggregator(cls, aggregator: str) -> str:
+        if aggregator not in AGGREGATOR_MODELS_SET:
+            raise ValueError(f"Invalid aggregator: {aggregator}")
+        return aggregator
 
 class OptimizeRequest(BaseModel):
     prompt: str
@@ -94,85 +402,240 @@ class ChatResponse(BaseModel):
 # UTILITY FUNCTIONS
 # ============================================
 
-def log_query(prompt: str, models: List[str], aggregator: str, raw_responses: List[Dict], aggregated: str) -> None:
-    """Log a completed query to query_log.json"""
-    log_file = Path("query_log.json")
+def cache_key(**parts) -> str:
+    """Build a stable SHA-256 key for response_cache from the inputs of an upstream call"""
+    return hashlib.sha256(orjson.dumps(parts, option=orjson.OPT_SORT_KEYS)).hexdigest()
 
-    try:
-        logs = json.loads(log_file.read_text()) if log_file.exists() else []
-    except:
-        logs = []
+def build_system_message(content: str, model: str) -> Dict:
+    """Build a system message, marking it cacheable for Anthropic models (OpenAI caches prefixes automatically)"""
+    if model.startswith("anthropic/"):
+        return {
+            "role": "system",
+            "content": [{"type": "text", "text": content, "cache_control": {"type": "ephemeral"}}]
+        }
+    return {"role": "system", "content": content}
+
+async def log_writer() -> None:
+    """Drain log_queue, appending each entry to its JSONL file"""
+    while True:
+        log_file, entry = await log_queue.get()
+        try:
+            async with aiofiles.open(log_file, "ab") as f:
+                await f.write(orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE))
+        except OSError as e:
+            print(f"Failed to write {log_file}: {e}")
+        finally:
+            log_queue.task_done()
+
+async def expire_queries() -> None:
+    """Periodically evict expired query status and results so memory stays bounded"""
+    while True:
+        await asyncio.sleep(JANITOR_INTERVAL)
+        query_status.expire()
+        query_results.expire()
+
+def get_model_limiter(model: str) -> AdaptiveLimiter:
+    """Concurrency limiter for a model, created on first use"""
+    if model not in model_limiters:
+        model_limiters[model] = AdaptiveLimiter()
+    return model_limiters[model]
+
+def retry_delay(error: Exception, attempt: int) -> float:
+    """Backoff before the next attempt, stretched to honor a Retry-After header"""
+    delay = min(2 ** attempt + random.random(), RETRY_MAX_DELAY)
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            delay = max(delay, float(retry_after))
+        except ValueError:
+            pass  # HTTP-date form - keep the computed backoff
+    return delay
+
+def current_date() -> str:
+    """Today's date for the optimizer (e.g. "November 10, 2025"), re-formatted only when the local date changes"""
+    today = datetime.now().date()
+    if today_cache["day"] != today:
+        today_cache["date"] = today.strftime("%B %d, %Y")
+        today_cache["day"] = today
+    return today_cache["date"]
+
+def clean_optimized(optimized: str) -> str:
+    """Clean up any explanatory preambles that slip through the optimizer"""
+    # Remove common patterns like "I'll first..." or "Based on..." along with their indented follow-on lines
+    return PREAMBLE_RE.sub("", optimized).strip()
+
+def format_sse(event: str, data) -> str:
+    """Encode one Server-Sent Events frame with a JSON payload"""
+    return f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+def single_model_answer(response: Dict) -> str:
+    """Stand-in for the synthesis when only one model answered"""
+    return f"## Single model response ({response['model']})\n\n{response['response']}"
+
+def format_individual(raw_responses: List[Dict]) -> List[Dict]:
+    """Shape raw model results for the client, folding errors into the response text"""
+    return [
+        {
+            "model": r["model"],
+            "response": r["response"] if not r["error"] else f"Error: {r['error']}",
+            "tokens": r["tokens"]
+        }
+        for r in raw_responses
+    ]
 
-    logs.append({
-        "timestamp": datetime.now().isoformat(),
+def build_status(request_id: str) -> Dict:
+    """Snapshot of a query's progress with per-model elapsed times"""
+    status_data = query_status[request_id]
+    current_time = time.time()
+
+    # Build response with elapsed times
+    models_status = {}
+    for model, data in status_data["models"].items():
+        elapsed = None
+        if data["start_time"]:
+            if data["end_time"]:
+                elapsed = round(data["end_time"] - data["start_time"], 1)
+            else:
+                elapsed = round(current_time - data["start_time"], 1)
+
+        models_status[model] = {
+            "status": data["status"],
+            "elapsed": elapsed,
+            "error": data["error"]
+        }
+
+    return {
+        "models": models_status,
+        "aggregation_status": status_data["aggregation_status"]
+    }
+
+def publish_event(request_id: str, event: str, data) -> None:
+    """Push an event to every client streaming this request via /api/stream"""
+    for queue in query_listeners.get(request_id, ()):
+        queue.put_nowait((event, data))
+
+def broadcast_event(request_id: str, event: str, data) -> None:
+    """Push an event to listeners of a request and any requests coalesced onto it"""
+    for listener_id in [request_id, *query_followers.get(request_id, ())]:
+        publish_event(listener_id, event, data)
+
+def publish_status(request_id: str) -> None:
+    """Send the current status snapshot to everyone following a request"""
+    broadcast_event(request_id, "status", build_status(request_id))
+
+def update_model_status(request_id: Optional[str], model: str, status: str, start_time: float,
+                        end_time: Optional[float] = None, error: Optional[str] = None) -> None:
+    """Record a model status transition (no-op without a tracked request_id) and notify listeners"""
+    if request_id and request_id in query_status:
+        query_status[request_id]["models"][model] = {
+            "status": status,
+            "start_time": start_time,
+            "end_time": end_time,
+            "error": error
+        }
+        publish_status(request_id)
+
+def update_aggregation_status(request_id: str, status: str) -> None:
+    """Record an aggregation status transition and notify listeners"""
+    query_status[request_id]["aggregation_status"] = status
+    publish_status(request_id)
+
+def store_result(request_id: str, result: Dict) -> None:
+    """Store a query's final result (or error) and deliver it to listeners"""
+    query_results[request_id] = result
+    publish_event(request_id, "result", result)
+
+def log_query(prompt: str, models: List[str], aggregator: str, raw_responses: List[Dict], aggregated: str) -> None:
+    """Queue a completed query for query_log.jsonl"""
+    # Collect per-model entries and the token total in a single pass
+    individual_responses = []
+    total_tokens = 0
+    for r in raw_responses:
+        cached = r.get("cached", False)
+        individual_responses.append({
+            "model": r["model"],
+            "response": r["response"],
+            "tokens": r["tokens"],
+            "error": r["error"],
+            "cached": cached
+        })
+        if not cached:
+            total_tokens += r["tokens"]  # Only calls that actually went upstream count as spend
+
+    log_queue.put_nowait((QUERY_LOG_FILE, {
+        "timestamp": datetime.now(timezone.utc),  # orjson serializes datetimes natively
         "user_prompt": prompt,
         "models_used": models,
         "aggregator": aggregator,
-        "individual_responses": [
-            {
-                "model": r["model"],
-                "response": r["response"],
-                "tokens": r["tokens"],
-                "error": r["error"]
-            }
-            for r in raw_responses
-        ],
+        "individual_responses": individual_responses,
         "aggregated_response": aggregated,
-        "total_tokens": sum(r["tokens"] for r in raw_responses)
-    })
-
-    log_file.write_text(json.dumps(logs, indent=2))
+        "total_tokens": total_tokens
+    }))
 
 def log_optimization(original: str, optimized: str, tokens: int) -> None:
-    """Log a prompt optimization to optimization_log.json"""
-    log_file = Path("optimization_log.json")
-
-    try:
-        logs = json.loads(log_file.read_text()) if log_file.exists() else []
-    except:
-        logs = []
-
-    logs.append({
-        "timestamp": datetime.now().isoformat(),
+    """Queue a prompt optimization for optimization_log.jsonl"""
+    log_queue.put_nowait((OPTIMIZATION_LOG_FILE, {
+        "timestamp": datetime.now(timezone.utc),
         "original": original,
         "optimized": optimized,
-        "model": "anthropic/claude-3.5-haiku",
+        "model": OPTIMIZER_MODEL,
         "tokens": tokens
-    })
-
-    log_file.write_text(json.dumps(logs, indent=2))
+    }))
 
 # ============================================
 # CORE BUSINESS LOGIC
 # ============================================
 
+async def create_completion(model: str, deadline: float, **kwargs):
+    """Call a model through its limiter, retrying transient failures until attempts or time run out"""
+    limiter = get_model_limiter(model)
+    for attempt in range(RETRY_ATTEMPTS):
+        try:
+            async with limiter, UPSTREAM_SEM:
+                call_start = time.time()
+                budget = max(deadline - call_start, 1.0)
+                # httpx's float timeout only bounds each read (keepalive bytes reset it), so asyncio enforces
+                # the overall deadline; cancelling mid-request makes httpcore close the connection
+                async with asyncio.timeout(budget):
+                    response = await fanout_client.chat.completions.create(model=model, timeout=budget, **kwargs)
+                limiter.on_success(time.time() - call_start)
+            return response
+        except (APITimeoutError, TimeoutError):
+            raise  # The time budget is spent - nothing left to retry with
+        except (RateLimitError, APIConnectionError, InternalServerError) as e:
+            if isinstance(e, RateLimitError):
+                limiter.on_rate_limit()  # Back off this model only
+            delay = retry_delay(e, attempt)
+            if attempt == RETRY_ATTEMPTS - 1 or time.time() + delay >= deadline:
+                raise
+            await asyncio.sleep(delay)
+
 async def query_model(model: str, prompt: str, request_id: str = None) -> Dict:
     """Query a single model with timeout and error handling, tracking status in real-time"""
-    timeout = 120.0  # All models get 2 minutes (most complete in ~10 seconds)
+    timeout = MODEL_META.get(model, {}).get("timeout", DEFAULT_MODEL_TIMEOUT)
 
     start_time = time.time()
 
+    # Serve repeated prompts from the cache without touching the network
+    key = cache_key(model=model, prompt=prompt, max_tokens=4000)
+    cached = response_cache.get(key)
+    if cached is not None:
+        update_model_status(request_id, model, "completed", start_time, time.time())
+        return {**cached, "cached": True}  # Tokens kept as the response size; log_query doesn't count them as spend
+
     # Update status to "querying" if request_id provided
-    if request_id and request_id in query_status:
-        query_status[request_id]["models"][model] = {
-            "status": "querying",
-            "start_time": start_time,
-            "end_time": None,
-            "error": None
-        }
+    update_model_status(request_id, model, "querying", start_time)
 
     try:
-        response = await asyncio.wait_for(
-            client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": "Be concise and data-focused. Omit preambles, disclaimers, and process explanations. Start directly with key findings using bullet points. Cite sources inline (e.g., 'per ESPN') without full URLs. Target 300-500 words for simple queries, expand as needed for complex questions."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=4000,  # Safety net - models naturally stop when done
-                timeout=timeout
-            ),
-            timeout=timeout
+        response = await create_completion(
+            model,
+            start_time + timeout,
+            messages=[
+                build_system_message(QUERY_SYSTEM_PROMPT, model),
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=4000  # Safety net - models naturally stop when done
         )
 
         # Get token count with validation (OpenRouter sometimes returns inflated values)
@@ -187,32 +650,23 @@ async def query_model(model: str, prompt: str, request_id: str = None) -> Dict:
         end_time = time.time()
 
         # Update status to "completed"
-        if request_id and request_id in query_status:
-            query_status[request_id]["models"][model] = {
-                "status": "completed",
-                "start_time": start_time,
-                "end_time": end_time,
-                "error": None
-            }
+        update_model_status(request_id, model, "completed", start_time, end_time)
 
-        return {
+        result = {
             "model": model,
             "response": response.choices[0].message.content,
             "tokens": tokens,
             "error": None
         }
-    except asyncio.TimeoutError:
+        # Only successful completions are cached so failures are retried on the next request
+        response_cache[key] = result
+        return dict(result)
+    except (APITimeoutError, TimeoutError):  # Idle read timeout from httpx or the overall deadline from asyncio
         end_time = time.time()
         error_msg = f"Request timed out after {timeout} seconds"
 
         # Update status to "timeout"
-        if request_id and request_id in query_status:
-            query_status[request_id]["models"][model] = {
-                "status": "timeout",
-                "start_time": start_time,
-                "end_time": end_time,
-                "error": error_msg
-            }
+        update_model_status(request_id, model, "timeout", start_time, end_time, error_msg)
 
         return {
             "model": model,
@@ -225,13 +679,7 @@ async def query_model(model: str, prompt: str, request_id: str = None) -> Dict:
         error_msg = str(e)
 
         # Update status to "error"
-        if request_id and request_id in query_status:
-            query_status[request_id]["models"][model] = {
-                "status": "error",
-                "start_time": start_time,
-                "end_time": end_time,
-                "error": error_msg
-            }
+        update_model_status(request_id, model, "error", start_time, end_time, error_msg)
 
         return {
             "model": model,
@@ -240,133 +688,306 @@ async def query_model(model: str, prompt: str, request_id: str = None) -> Dict:
             "error": error_msg
         }
 
-async def aggregate_responses(query: str, responses: List[Dict], aggregator_model: str) -> str:
-    """Use specified model to aggregate all model responses"""
+def build_aggregation_request(query: str, responses: List[Dict], aggregator_model: str) -> Tuple[str, str, List[Dict]]:
+    """Prepare a synthesis call, returning (cache key, aggregator model without :online, messages)"""
 
     # Strip :online suffix from aggregator to prevent it from doing its own web search
     # The aggregator should ONLY synthesize the responses, not search independently
     aggregator_model_clean = aggregator_model.replace(':online', '')
 
-    # Format individual responses for the aggregation prompt
-    # Add context hints for models with special capabilities
-    model_notes = {
-        "anthropic/claude-sonnet-4.5:online": " (strong reasoning, detailed analysis)",
-        "x-ai/grok-4:online": " (real-time X/Twitter access)",
-        "perplexity/sonar-pro": " (native web search with citations)",
-        "google/gemini-2.0-flash-001:online": " (multimodal capabilities, Google search)"
-    }
+    # Same query + same model outputs always produce the same synthesis request
+    key = cache_key(
+        aggregator=aggregator_model_clean,
+        query=query,
+        responses=[[r["model"], r["response"], r["error"]] for r in responses]
+    )
 
-    formatted_responses = ""
+    # Format individual responses for the aggregation prompt
+    parts = []
     for idx, resp in enumerate(responses, 1):
         model_name = resp['model']
-        model_note = model_notes.get(model_name, "")
+        model_note = MODEL_META.get(model_name, {}).get("note", "")
 
         if resp["error"]:
-            formatted_responses += f"\n{idx}. **{model_name}**{model_note}: [ERROR: {resp['error']}]\n"
+            parts.append(f"\n{idx}. **{model_name}**{model_note}: [ERROR: {resp['error']}]\n")
         else:
-            formatted_responses += f"\n{idx}. **{model_name}**{model_note}:\n{resp['response']}\n"
+            parts.append(f"\n{idx}. **{model_name}**{model_note}:\n{resp['response']}\n")
+    formatted_responses = "".join(parts)
 
-    aggregation_prompt = f"""Synthesize these AI model responses. They already performed web searches - use only their findings.
+    aggregation_prompt = AGGREGATION_TEMPLATE.format(query=query, formatted_responses=formatted_responses)
 
-Original Query: {query}
+    messages = [
+        build_system_message(AGGREGATION_SYSTEM_PROMPT, aggregator_model_clean),
+        {"role": "user", "content": aggregation_prompt}
+    ]
+    return key, aggregator_model_clean, messages
 
-Model Responses:
-{formatted_responses}
-
-Output format:
-
-## KEY CONSENSUS
-2-3 bullet points max of baseline facts most models agree on. Include numbers, dates, names.
-
-## UNIQUE INSIGHTS BY MODEL
-What each model uniquely contributed (exclusive data, novel angles, sources only 1-2 models found):
+async def aggregate_responses(query: str, responses: List[Dict], aggregator_model: str, request_id: str = None) -> Tuple[str, bool]:
+    """Use specified model to aggregate all model responses, streaming tokens to /api/stream listeners - returns (text, ok)"""
+    parts = []
+    try:
+        async for delta in stream_aggregation(query, responses, aggregator_model):
+            parts.append(delta)
+            if request_id:
+                broadcast_event(request_id, "aggregation_token", delta)
+        return "".join(parts), True
+    except Exception as e:
+        return f"Error during aggregation: {str(e)}", False
+
+async def stream_aggregation(query: str, responses: List[Dict], aggregator_model: str) -> AsyncIterator[str]:
+    """Like aggregate_responses, but yield the synthesis text as it is generated (raises on upstream errors)"""
+    key, aggregator_model_clean, messages = build_aggregation_request(query, responses, aggregator_model)
+    cached = response_cache.get(key)
+    if cached is not None:
+        yield cached
+        return
+
+    parts = []
+    async with UPSTREAM_SEM:
+        stream = await client.chat.completions.create(
+            model=aggregator_model_clean,  # Use cleaned model name without :online
+            messages=messages,
+            max_tokens=5000,  # Cost ceiling for runaway generations - comprehensive synthesis fits well within it
+            stream=True
+        )
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                parts.append(delta)
+                yield delta
 
-**From GPT-4o (Model 1):** [List unique findings, or "No unique insights" if overlaps with others]
+    response_cache[key] = "".join(parts)
 
-**From Claude (Model 2):** [List unique findings, prioritize detailed analysis and exclusive data points]
+async def optimize_text(prompt: str, today: str) -> Tuple[str, int]:
+    """Rewrite a prompt with the optimizer model, returning (optimized, tokens) - cached per (prompt, date), 0 tokens on a hit"""
+    # Output depends only on the prompt and today's date, so tweak-and-retry hits the cache
+    key = (OPTIMIZER_MODEL, prompt, today)
+    cached = optimization_cache.get(key)
+    if cached is not None:
+        return cached[0], 0  # Nothing was spent, so nothing is logged as spent
 
-**From Perplexity (Model 3):** [List unique findings, prioritize citation quality and exclusive sources]
+    optimization_prompt = OPTIMIZATION_TEMPLATE.format(today=today, prompt=prompt)
 
-**From Grok (Model 4):** [List unique findings, prioritize X/Twitter posts and real-time social data]
+    async with UPSTREAM_SEM:
+        response = await client.chat.completions.create(
+            model=OPTIMIZER_MODEL,
+            messages=[{"role": "user", "content": optimization_prompt}],
+            max_tokens=600,  # Slightly increased for complex prompts
+            temperature=0.5  # Lower temperature for more consistent format
+        )
 
-**From Gemini (Model 5):** [List unique findings, prioritize Google search exclusives]
+    optimized = response.choices[0].message.content.strip()
 
-## WATCH FOR
-**Next 24-72 Hours:**
-- [Immediate developments, breaking news to monitor, upcoming announcements]
-- [Specific events with dates/times]
+    result = (clean_optimized(optimized), response.usage.total_tokens if response.usage else 0)
+    optimization_cache[key] = result
+    return result
 
-**Next 1-4 Weeks:**
-- [Short-term trends to track, upcoming decisions/votes/releases]
-- [Key metrics or indicators to monitor]
-- [People, organizations, or events to follow]
+async def optimize_many(prompts: List[str], today: str) -> List[Tuple[str, int]]:
+    """Rewrite several distinct prompts in one optimizer call, falling back to one call each"""
+    numbered = "\n".join(f"{idx}. {orjson.dumps(prompt).decode()}" for idx, prompt in enumerate(prompts, 1))
+    optimization_prompt = OPTIMIZATION_BATCH_TEMPLATE.format(today=today, prompts=numbered, count=len(prompts))
 
-## SOURCES
-Key sources cited above:
-[1] Source name
-[2] Source name
-
-Rules: No preambles. Start with ## KEY CONSENSUS. Show model attribution to highlight each model's unique value."""
-
-    try:
+    async with UPSTREAM_SEM:
         response = await client.chat.completions.create(
-            model=aggregator_model_clean,  # Use cleaned model name without :online
-            messages=[{"role": "user", "content": aggregation_prompt}],
-            max_tokens=5000  # Increased for comprehensive synthesis
+            model=OPTIMIZER_MODEL,
+            messages=[{"role": "user", "content": optimization_prompt}],
+            max_tokens=600 * len(prompts),
+            temperature=0.5
         )
-        return response.choices[0].message.content
-    except Exception as e:
-        return f"Error during aggregation: {str(e)}"
+
+    # Tolerate code fences or stray text around the array
+    content = response.choices[0].message.content or ""
+    try:
+        optimized = orjson.loads(content[content.index("["):content.rindex("]") + 1])
+    except (ValueError, orjson.JSONDecodeError):
+        optimized = None
+    if not (isinstance(optimized, list) and len(optimized) == len(prompts) and all(isinstance(o, str) for o in optimized)):
+        return list(await asyncio.gather(*[optimize_text(prompt, today) for prompt in prompts]))
+
+    # Usage is reported for the whole call, so each prompt is logged with an even share
+    tokens = (response.usage.total_tokens if response.usage else 0) // len(prompts)
+    # Not cached: every output came from a context shared with other users' prompts, any of which
+    # could steer the rest - only single-prompt optimize_text results are safe to serve to everyone
+    return [(clean_optimized(text.strip()), tokens) for text in optimized]
+
+class OptimizeBatcher:
+    """Collects /api/optimize requests for a short window and sends them to the optimizer together"""
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self._flushes = set()  # Strong references so running flushes aren't garbage collected
+
+    async def submit(self, prompt: str, today: str) -> Tuple[str, int]:
+        """Optimize a prompt as part of the next batch, returning (optimized, tokens) - 0 tokens on a cache hit"""
+        cached = optimization_cache.get((OPTIMIZER_MODEL, prompt, today))
+        if cached is not None:
+            return cached[0], 0
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((prompt, today, future))
+        return await future
+
+    async def run(self) -> None:
+        """Gather requests into batches for the app's lifetime (started from lifespan)"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            window_end = loop.time() + OPTIMIZE_BATCH_WINDOW
+            while len(batch) < OPTIMIZE_BATCH_SIZE:
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout=window_end - loop.time()))
+                except asyncio.TimeoutError:
+                    break
+
+            # Keep collecting the next batch while this one is with the optimizer
+            flush = asyncio.create_task(self.flush(batch))
+            self._flushes.add(flush)
+            flush.add_done_callback(self._flushes.discard)
+
+    async def flush(self, batch: List[Tuple[str, str, asyncio.Future]]) -> None:
+        """Optimize one batch, grouped by date with duplicate prompts sent once, and resolve its futures"""
+        groups = {}
+        for prompt, today, future in batch:
+            groups.setdefault(today, {}).setdefault(prompt, []).append(future)
+
+        for today, waiters in groups.items():
+            prompts = list(waiters)
+            try:
+                if len(prompts) == 1:
+                    results = [await optimize_text(prompts[0], today)]
+                else:
+                    results = await optimize_many(prompts, today)
+            except Exception as e:
+                results = [e] * len(prompts)
+
+            for prompt, result in zip(prompts, results):
+                for future in waiters[prompt]:
+                    if future.done():
+                        continue  # Client went away
+                    if isinstance(result, Exception):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+
+optimize_batcher = OptimizeBatcher()
 
 # ============================================
 # BACKGROUND PROCESSING
 # ============================================
 
-async def process_query_background(request_id: str, prompt: str, models: List[str], aggregator: str):
-    """Background task to process the actual query"""
+def skip_model(request_id: str, model: str) -> Dict:
+    """Record a model cut off for latency, returning its placeholder result"""
+    error_msg = "Skipped for latency"
+    start_time = query_status[request_id]["models"][model]["start_time"] if request_id in query_status else None
+    update_model_status(request_id, model, "skipped", start_time, time.time(), error_msg)
+    return {
+        "model": model,
+        "response": "",
+        "tokens": 0,
+        "error": error_msg
+    }
+
+async def process_query_background(request_id: str, prompt: str, models: List[str], aggregator: str) -> bool:
+    """Background task to process the actual query - returns True only for a complete, error-free result"""
     try:
         # Query all models in parallel with request_id for status tracking
-        tasks = [query_model(model, prompt, request_id) for model in models]
-        raw_responses = await asyncio.gather(*tasks)
-
-        # Filter out completely failed responses but keep partial data
-        successful_responses = [r for r in raw_responses if not r["error"]]
-
-        if not successful_responses:
-            query_results[request_id] = {"error": "All model queries failed"}
-            return
-
-        # Update aggregation status to "running"
-        query_status[request_id]["aggregation_status"] = "running"
-
-        # Aggregate responses using selected aggregator model
-        aggregated = await aggregate_responses(prompt, raw_responses, aggregator)
-
-        # Update aggregation status to "completed"
-        query_status[request_id]["aggregation_status"] = "completed"
+        tasks = {model: asyncio.create_task(query_model(model, prompt, request_id)) for model in models}
+
+        # Start aggregating once a quorum has succeeded (or the soft deadline passes with at least
+        # one success) instead of waiting on the slowest model
+        quorum = min(len(models), max(EARLY_AGGREGATION_MIN, len(models) - 2))
+        deadline = time.time() + SOFT_DEADLINE
+        done = {}
+        succeeded = 0
+        pending = set(tasks.values())
+        while pending and succeeded < quorum:
+            remaining = deadline - time.time()
+            if remaining <= 0 and succeeded:
+                break
+            finished, pending = await asyncio.wait(
+                pending, timeout=remaining if remaining > 0 else None, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in finished:
+                result = task.result()
+                done[result["model"]] = result
+                if not result["error"]:
+                    succeeded += 1
+
+        # Every model has finished without a quorum - continue with partial data unless all failed
+        if not succeeded:
+            store_result(request_id, {"error": "All model queries failed"})
+            return False
+
+        if succeeded == 1:
+            # Nothing to reconcile - pass the single answer through instead of paying for a rewrite
+            aggregated = single_model_answer(next(r for r in done.values() if not r["error"]))
+            aggregation_ok = True
+            update_aggregation_status(request_id, "skipped")
+        else:
+            # Models still running are passed to the aggregator as placeholders (kept in selection order)
+            early_responses = [
+                done.get(model) or {"model": model, "response": "", "tokens": 0, "error": "Still running when synthesis started"}
+                for model in models
+            ]
+
+            # Update aggregation status to "running"
+            update_aggregation_status(request_id, "running")
+
+            # Aggregate responses using selected aggregator model while late models finish
+            aggregated, aggregation_ok = await aggregate_responses(prompt, early_responses, aggregator, request_id)
+
+            # Update aggregation status to "completed"
+            update_aggregation_status(request_id, "completed")
+
+        # Models still running after the synthesis are cut off rather than holding back the result
+        raw_responses = []
+        for model, task in tasks.items():
+            if task.done():
+                raw_responses.append(task.result())
+            else:
+                task.cancel()
+                raw_responses.append(skip_model(request_id, model))
 
         # Format individual responses
-        individual = [
-            {
-                "model": r["model"],
-                "response": r["response"] if not r["error"] else f"Error: {r['error']}",
-                "tokens": r["tokens"]
-            }
-            for r in raw_responses
-        ]
+        individual = format_individual(raw_responses)
 
         # Store results
-        query_results[request_id] = {
+        store_result(request_id, {
             "aggregated": aggregated,
             "individual": individual,
             "request_id": request_id
-        }
+        })
 
         # Log the query
         log_query(prompt, models, aggregator, raw_responses, aggregated)
 
+        # Failed synthesis or any failed/skipped/timed-out model makes the result incomplete
+        return aggregation_ok and not any(r["error"] for r in raw_responses)
+
     except Exception as e:
-        query_results[request_id] = {"error": str(e)}
+        store_result(request_id, {"error": str(e)})
+        return False
+
+async def process_shared_query(key: str, request_id: str, prompt: str, models: List[str], aggregator: str):
+    """Run a query on behalf of every request coalesced onto it, then cache and hand out the result"""
+    future = inflight_queries[key][1]
+    complete = False
+    try:
+        complete = await process_query_background(request_id, prompt, models, aggregator)
+    finally:
+        del inflight_queries[key]
+        query_followers.pop(request_id, None)
+        result = query_results.get(request_id, {"error": "Query did not complete"})
+        status = query_status.get(request_id)
+        # Only complete successes are cached, so a repeat of a failed or partial query runs again
+        if complete and status:
+            query_cache[key] = (copy.deepcopy(status), result)
+        future.set_result(result)
+
+def share_result(request_id: str, result: Dict) -> None:
+    """Store a shared or cached result under another request's id"""
+    if "request_id" in result:
+        result = {**result, "request_id": request_id}
+    store_result(request_id, result)
 
 # ============================================
 # API ENDPOINTS
@@ -377,93 +998,18 @@ async def process_query_background(request_id: str, prompt: str, models: List[st
 # --------------------------------------------
 
 @app.post("/api/optimize")
-async def optimize_prompt(request: OptimizeRequest):
+async def optimize_prompt(request: OptimizeRequest, background_tasks: BackgroundTasks):
     """
     Optimize a user's prompt for better research results.
     Uses Claude Haiku (offline) with system date injection - NO web search needed.
     """
-    today = datetime.now().strftime("%B %d, %Y")  # e.g., "November 10, 2025"
-
-    optimization_prompt = f"""You are a prompt optimization assistant for a multi-model AI research tool. The tool queries 5 AI models in parallel (with web search enabled) and synthesizes their responses.
-
-IMPORTANT CONTEXT:
-- Today's actual date is: {today}
-- The research models will do web searches, not you
-- Your job is to optimize the prompt structure, not to search for information
-
-USER'S ORIGINAL PROMPT:
-{request.prompt}
-
-TASK: Rewrite this prompt to get maximum value from web-enabled AI models. Apply these principles:
-
-1. FIX ERRORS: Correct any typos or grammatical mistakes
-
-2. ADD STRUCTURE: Break complex queries into numbered sections (e.g., 1. X, 2. Y, 3. Z)
-
-3. INCREASE SPECIFICITY:
-   - For CURRENT EVENTS (e.g., "latest", "current", "today", "recent news", ongoing situations):
-     Add "as of {today}" to the prompt
-   - For HISTORICAL QUERIES (e.g., "2008 crisis", "World War II", queries about past events with dates):
-     Keep the historical timeframe, DO NOT add current dates
-   - For queries asking to "compare past to present", add {today} only for the present-day portion
-   - Name specific companies, people, metrics instead of generic terms
-   - Request quantifiable data (percentages, dollar amounts, counts)
-
-4. DEMAND SOURCES: Add "Cite sources with links" or "Provide specific sources"
-
-5. GUIDE OUTPUT: Specify what format/details you want (timelines, predictions, comparisons)
-
-CRITICAL RULES:
-- Determine if this is current/historical based on keywords in the prompt (don't search, just analyze the text)
-- Only add {today} for genuinely current/ongoing events
-- Keep the core intent and topic the same
-- Don't make it overly long (aim for 3-8 lines for simple queries, longer OK for complex multi-part questions)
-- Don't add unnecessary complexity if the original is already clear
-- If the original is already well-structured, make minimal changes
-
-OUTPUT: Return ONLY the optimized prompt text, no explanations or meta-commentary.
-
-EXAMPLE BAD OUTPUT (do NOT do this):
-"I'll analyze this prompt... Based on the keywords, here's the optimized version: [prompt]"
-
-EXAMPLE GOOD OUTPUT (do this):
-"[Just the optimized prompt with no preamble or explanation]"
-"""
+    today = current_date()
 
     try:
-        response = await client.chat.completions.create(
-            model="anthropic/claude-3.5-haiku",  # NO :online suffix - we don't need web search
-            messages=[{"role": "user", "content": optimization_prompt}],
-            max_tokens=600,  # Slightly increased for complex prompts
-            temperature=0.5  # Lower temperature for more consistent format
-        )
+        optimized, tokens = await optimize_batcher.submit(request.prompt, today)
 
-        optimized = response.choices[0].message.content.strip()
-
-        # Clean up any explanatory preambles that slip through
-        # Remove common patterns like "I'll first..." or "Based on..."
-        lines = optimized.split('\n')
-        cleaned_lines = []
-        skip_mode = False
-
-        for line in lines:
-            # Skip lines that are meta-commentary
-            if any(phrase in line.lower() for phrase in [
-                "i'll first", "i'll optimize", "based on", "rationale for",
-                "here's the optimized", "here's an optimized", "the prompt provides"
-            ]):
-                skip_mode = True
-                continue
-            # If we hit actual content after skip mode, start collecting
-            if skip_mode and line.strip() and not line.startswith(' '):
-                skip_mode = False
-            if not skip_mode:
-                cleaned_lines.append(line)
-
-        optimized = '\n'.join(cleaned_lines).strip()
-
-        # Log the optimization
-        log_optimization(request.prompt, optimized, response.usage.total_tokens if response.usage else 0)
+        # Log the optimization after the response has been sent
+        background_tasks.add_task(log_optimization, request.prompt, optimized, tokens)
 
         return {"optimized": optimized}
 
@@ -483,22 +1029,24 @@ async def chat(request: ChatRequest, background_tasks: BackgroundTasks):
     Main chat endpoint - returns request_id immediately and processes in background
     """
 
-    # Validate models
-    invalid_models = [m for m in request.models if m not in AVAILABLE_MODELS]
-    if invalid_models:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid models: {invalid_models}"
-        )
-
-    if not request.models:
-        raise HTTPException(
-            status_code=400,
-            detail="At least one model must be selected"
-        )
-
     # Generate unique request ID for status tracking
     request_id = str(uuid.uuid4())
+    key = cache_key(prompt=request.prompt, models=sorted(request.models), aggregator=request.aggregator)
+
+    # Same query finished recently - answer from cache without touching upstream
+    if key in query_cache:
+        status, result = query_cache[key]
+        query_status[request_id] = copy.deepcopy(status)
+        share_result(request_id, result)
+        return {"request_id": request_id}
+
+    # Same query already running - follow it instead of starting another fan-out
+    if key in inflight_queries:
+        leader_id, future = inflight_queries[key]
+        query_status[request_id] = query_status[leader_id]  # Shared dict, so /api/status tracks the leader
+        query_followers.setdefault(leader_id, []).append(request_id)
+        future.add_done_callback(lambda f: share_result(request_id, f.result()))
+        return {"request_id": request_id}
 
     # Initialize status tracking for this request
     query_status[request_id] = {
@@ -508,11 +1056,48 @@ async def chat(request: ChatRequest, background_tasks: BackgroundTasks):
     }
 
     # Start background processing
-    background_tasks.add_task(process_query_background, request_id, request.prompt, request.models, request.aggregator)
+    inflight_queries[key] = (request_id, asyncio.get_running_loop().create_future())
+    background_tasks.add_task(process_shared_query, key, request_id, request.prompt, request.models, request.aggregator)
 
     # Return request_id immediately so frontend can start polling
     return {"request_id": request_id}
 
+@app.post("/api/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Streaming variant of /api/chat - Server-Sent Events over a single response
+    Sends an "individual" event with all model responses, then "token" events as the
+    synthesis is generated, and finally "done" (or "error")
+    """
+    async def events():
+        raw_responses = await asyncio.gather(*[query_model(model, request.prompt) for model in request.models])
+        yield format_sse("individual", format_individual(raw_responses))
+
+        successful = [r for r in raw_responses if not r["error"]]
+        if not successful:
+            yield format_sse("error", {"error": "All model queries failed"})
+            return
+
+        if len(successful) == 1:
+            # Nothing to reconcile - send the single answer as the synthesis
+            aggregated = single_model_answer(successful[0])
+            yield format_sse("token", aggregated)
+        else:
+            parts = []
+            try:
+                async for delta in stream_aggregation(request.prompt, raw_responses, request.aggregator):
+                    parts.append(delta)
+                    yield format_sse("token", delta)
+            except Exception as e:
+                yield format_sse("error", {"error": f"Error during aggregation: {str(e)}"})
+                return
+
+            aggregated = "".join(parts)
+        log_query(request.prompt, request.models, request.aggregator, raw_responses, aggregated)
+        yield format_sse("done", {"aggregated": aggregated})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
 @app.get("/api/status/{request_id}")
 async def get_status(request_id: str):
     """
@@ -522,29 +1107,47 @@ async def get_status(request_id: str):
     if request_id not in query_status:
         raise HTTPException(status_code=404, detail="Request ID not found")
 
-    status_data = query_status[request_id]
-    current_time = time.time()
+    # Payload is built from our own status dict, so skip FastAPI's jsonable_encoder pass
+    return ORJSONResponse(build_status(request_id))
 
-    # Build response with elapsed times
-    models_status = {}
-    for model, data in status_data["models"].items():
-        elapsed = None
-        if data["start_time"]:
-            if data["end_time"]:
-                elapsed = round(data["end_time"] - data["start_time"], 1)
-            else:
-                elapsed = round(current_time - data["start_time"], 1)
-
-        models_status[model] = {
-            "status": data["status"],
-            "elapsed": elapsed,
-            "error": data["error"]
-        }
+@app.get("/api/stream/{request_id}")
+async def stream_status(request_id: str):
+    """
+    Push status updates and the final result for a query as Server-Sent Events
+    Replaces polling /api/status and /api/result: sends a "status" snapshot on connect,
+    a new "status" event on every transition, then a single "result" event
+    """
+    if request_id not in query_status:
+        raise HTTPException(status_code=404, detail="Request ID not found")
 
-    return {
-        "models": models_status,
-        "aggregation_status": status_data["aggregation_status"]
-    }
+    async def events():
+        queue = asyncio.Queue()
+        query_listeners.setdefault(request_id, []).append(queue)
+        try:
+            # Current state first, so late or reconnecting clients miss nothing
+            yield format_sse("status", build_status(request_id))
+            if request_id in query_results:
+                yield format_sse("result", query_results[request_id])
+                return
+
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(event, data)
+                if event == "result":
+                    return
+        finally:
+            # Runs on completion and on client disconnect
+            listeners = query_listeners.get(request_id, [])
+            if queue in listeners:
+                listeners.remove(queue)
+            if not listeners:
+                query_listeners.pop(request_id, None)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 @app.get("/api/result/{request_id}")
 async def get_result(request_id: str):
@@ -557,14 +1160,33 @@ async def get_result(request_id: str):
     # Check if results are ready
     if request_id in query_results:
         result = query_results[request_id]
-        # Clean up after returning (optional - could keep for caching)
-        # del query_status[request_id]
-        # del query_results[request_id]
-        return result
+        # Results are built internally with known types - serialize directly without re-encoding
+        return ORJSONResponse(result)
 
     # Results not ready yet
     return {"status": "processing"}
 
+# --------------------------------------------
+# Monitoring
+# --------------------------------------------
+
+@app.get("/api/metrics")
+async def metrics():
+    """
+    In-memory state sizes, so growth is visible without attaching a profiler
+    """
+    return {
+        "tracked_queries": len(query_status),
+        "stored_results": len(query_results),
+        "inflight_queries": len(inflight_queries),
+        "stream_listeners": sum(len(queues) for queues in query_listeners.values()),
+        "cached_responses": len(response_cache),
+        "cached_queries": len(query_cache),
+        "cached_optimizations": len(optimization_cache),
+        "model_limits": {model: {"limit": int(limiter.limit), "in_flight": limiter.in_flight}
+                         for model, limiter in model_limiters.items()}
+    }
+
 # --------------------------------------------
 # Navigation
 # --------------------------------------------
@@ -579,5 +1201,14 @@ async def root():
 # ============================================
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # uvloop event loop + httptools parser (uvloop is not available on Windows)
+    # Single worker on purpose: query_status/query_results live in this process
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8000,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools"
+    )
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+One-shot migration of the old JSON array logs to append-only JSON Lines
+
+Converts query_log.json -> query_log.jsonl and optimization_log.json -> optimization_log.jsonl.
+Entries already written to a .jsonl file by the new logger are kept after the migrated history.
+Each migrated .json file is renamed to .json.migrated (kept so it can be deleted once the output
+is checked), so running the script again never duplicates the history.
+
+Usage (from the project root):
+    python scripts/migrate_logs.py
+"""
+from pathlib import Path
+
+import orjson
+
+LOG_FILES = [
+    (Path("query_log.json"), Path("query_log.jsonl")),
+    (Path("optimization_log.json"), Path("optimization_log.jsonl")),
+]
+
+def migrated_name(old_file: Path) -> Path:
+    """Where old_file is kept after a successful migration"""
+    return old_file.with_name(old_file.name + ".migrated")
+
+def migrate(old_file: Path, new_file: Path) -> int:
+    """Rewrite new_file as the old array's entries followed by any existing JSONL lines"""
+    entries = orjson.loads(old_file.read_bytes())
+    if not isinstance(entries, list):
+        raise ValueError(f"expected a JSON array, got {type(entries).__name__}")
+    existing = new_file.read_bytes() if new_file.exists() else b""
+
+    with open(new_file, "wb") as f:
+        for entry in entries:
+            f.write(orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE))
+        f.write(existing)
+
+    old_file.rename(migrated_name(old_file))
+    return len(entries)
+
+def main():
+    for old_file, new_file in LOG_FILES:
+        if not old_file.exists():
+            print(f"⏭  {old_file} not found - skipping")
+            continue
+
+        if migrated_name(old_file).exists():
+            print(f"❌ {old_file} looks already migrated ({migrated_name(old_file)} exists) - remove one of them first")
+            continue
+
+        try:
+            count = migrate(old_file, new_file)
+        except orjson.JSONDecodeError as e:
+            print(f"❌ {old_file} is not valid JSON: {e}")
+            continue
+        except ValueError as e:
+            print(f"❌ {old_file} is not a JSON array log: {e}")
+            continue
+
+        print(f"✅ {old_file} -> {new_file} ({count} entries, original kept as {migrated_name(old_file)})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Print entries from the JSON Lines developer logs
+
+Reads one entry per line, so large logs are never loaded into memory at once.
+Malformed lines (e.g. a write cut short by a crash) are reported and skipped.
+
+Usage (from the project root):
+    python scripts/read_log.py                          # last 10 entries of query_log.jsonl
+    python scripts/read_log.py optimization_log.jsonl -n 5
+    python scripts/read_log.py query_log.jsonl --all
+"""
+import argparse
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterator
+
+import orjson
+
+def iter_log(log_file: Path) -> Iterator[Dict]:
+    """Yield log entries one line at a time"""
+    with open(log_file, "rb") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield orjson.loads(line)
+            except orjson.JSONDecodeError as e:
+                print(f"⚠️  {log_file}:{line_no} skipped: {e}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Print entries from a JSONL developer log")
+    parser.add_argument("log_file", nargs="?", default="query_log.jsonl", type=Path)
+    parser.add_argument("-n", type=int, default=10, help="number of most recent entries to print")
+    parser.add_argument("--all", action="store_true", help="print every entry")
+    args = parser.parse_args()
+
+    if not args.log_file.exists():
+        print(f"❌ {args.log_file} not found")
+        return
+
+    entries = iter_log(args.log_file) if args.all else deque(iter_log(args.log_file), maxlen=args.n)
+    for entry in entries:
+        print(orjson.dumps(entry, option=orjson.OPT_INDENT_2).decode())
+
+if __name__ == "__main__":
+    main()
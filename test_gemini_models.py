@@ -2,16 +2,11 @@
 """Test different Gemini model IDs on OpenRouter to find the best one"""
 
 import asyncio
-import os
-from dotenv import load_dotenv
-from openai import AsyncOpenAI
+import sys
+from pathlib import Path
 
-load_dotenv()
-
-client = AsyncOpenAI(
-    base_url="https://openrouter.ai/api/v1",
-    api_key=os.getenv("OPENROUTER_API_KEY")
-)
+sys.path.insert(0, str(Path(__file__).parent / "tests"))  # Shared client and probe helpers live in tests/_client.py
+from _client import buffered_output, client, probe, run
 
 # Models to test
 GEMINI_MODELS = [
@@ -20,75 +15,74 @@ GEMINI_MODELS = [
     "google/gemini-flash-1.5-exp",       # 1.5 Flash experimental
 ]
 
-async def test_model(model: str):
-    """Test a single Gemini model"""
-    print(f"\n{'='*60}")
-    print(f"Testing: {model}")
-    print('='*60)
+async def test_model(model: str) -> bool:
+    """Test a single Gemini model, printing its report as one block so parallel runs don't interleave"""
+    with buffered_output() as say:
+        return await check_model(model, say)
+
+async def check_model(model: str, say) -> bool:
+    """Test a single Gemini model, reporting through say()"""
+    say(f"\n{'='*60}")
+    say(f"Testing: {model}")
+    say('='*60)
 
     try:
-        response = await asyncio.wait_for(
-            client.chat.completions.create(
-                model=f"{model}:online",  # Test with :online suffix
-                messages=[{"role": "user", "content": "What is today's date? (Just give me the date)"}],
-                max_tokens=100
-            ),
-            timeout=30.0
+        response = await probe(
+            client,
+            model=f"{model}:online",  # Test with :online suffix
+            messages=[{"role": "user", "content": "What is today's date? (Just give me the date)"}],
+            max_tokens=100
         )
 
         content = response.choices[0].message.content
         tokens = response.usage.completion_tokens if response.usage else 0
 
-        print(f"✅ SUCCESS (with :online)")
-        print(f"Response: {content}")
-        print(f"Tokens: {tokens}")
+        say(f"✅ SUCCESS (with :online)")
+        say(f"Response: {content}")
+        say(f"Tokens: {tokens}")
 
         # Also test without :online suffix
-        response2 = await asyncio.wait_for(
-            client.chat.completions.create(
-                model=model,  # Without :online
-                messages=[{"role": "user", "content": "What is 2+2?"}],
-                max_tokens=50
-            ),
-            timeout=30.0
+        response2 = await probe(
+            client,
+            model=model,  # Without :online
+            messages=[{"role": "user", "content": "What is 2+2?"}],
+            max_tokens=50
         )
 
         content2 = response2.choices[0].message.content
-        print(f"✅ Also works without :online")
-        print(f"Response: {content2}")
+        say(f"✅ Also works without :online")
+        say(f"Response: {content2}")
 
         return True
 
     except Exception as e:
         error_str = str(e)
-        print(f"❌ FAILED")
-        print(f"Error: {error_str}")
+        say(f"❌ FAILED")
+        say(f"Error: {error_str}")
 
         # Try without :online suffix if :online failed
         if ":online" in error_str or "404" in error_str:
             try:
-                print(f"\nRetrying WITHOUT :online suffix...")
-                response = await asyncio.wait_for(
-                    client.chat.completions.create(
-                        model=model,  # Without :online
-                        messages=[{"role": "user", "content": "What is 2+2?"}],
-                        max_tokens=50
-                    ),
-                    timeout=30.0
+                say(f"\nRetrying WITHOUT :online suffix...")
+                response = await probe(
+                    client,
+                    model=model,  # Without :online
+                    messages=[{"role": "user", "content": "What is 2+2?"}],
+                    max_tokens=50
                 )
 
                 content = response.choices[0].message.content
                 tokens = response.usage.completion_tokens if response.usage else 0
 
-                print(f"✅ SUCCESS (without :online)")
-                print(f"Response: {content}")
-                print(f"Tokens: {tokens}")
-                print(f"⚠️  NOTE: This model does NOT support :online suffix for web search")
+                say(f"✅ SUCCESS (without :online)")
+                say(f"Response: {content}")
+                say(f"Tokens: {tokens}")
+                say(f"⚠️  NOTE: This model does NOT support :online suffix for web search")
 
                 return True
 
             except Exception as e2:
-                print(f"❌ Also failed without :online: {e2}")
+                say(f"❌ Also failed without :online: {e2}")
                 return False
 
         return False
@@ -97,12 +91,8 @@ async def main():
     print("Testing Gemini Models on OpenRouter")
     print("="*60)
 
-    results = {}
-
-    for model in GEMINI_MODELS:
-        success = await test_model(model)
-        results[model] = success
-        await asyncio.sleep(1)  # Rate limiting
+    # All models are tested in parallel - wall time is the slowest model, not the sum
+    results = dict(zip(GEMINI_MODELS, await asyncio.gather(*(test_model(m) for m in GEMINI_MODELS))))
 
     print("\n" + "="*60)
     print("SUMMARY")
@@ -135,4 +125,4 @@ async def main():
             print(f"  - {model}")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run(main())
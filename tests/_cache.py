@@ -0,0 +1,61 @@
+"""
+On-disk response cache for the test scripts
+
+Re-running a script with identical inputs returns the stored completion instead of
+calling OpenRouter again, so repeat runs take milliseconds and spend no tokens.
+Only low-temperature calls are cached - above 0.5 the sampled output is meant to vary.
+Delete tests/.test-cache to force fresh calls.
+"""
+import hashlib
+from pathlib import Path
+from typing import AsyncIterator
+
+import diskcache
+import orjson
+from openai import AsyncOpenAI
+from openai.types.chat import ChatCompletion
+
+CACHE_DIR = Path(__file__).with_name(".test-cache")
+MAX_CACHED_TEMPERATURE = 0.5
+
+cache = diskcache.Cache(str(CACHE_DIR))
+
+def cache_key(**kwargs) -> str:
+    """Stable hash of the request (model, messages, max_tokens, temperature, ...)"""
+    return hashlib.blake2b(orjson.dumps(kwargs, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+async def cached_create(client: AsyncOpenAI, **kwargs) -> ChatCompletion:
+    """client.chat.completions.create, served from disk when the same request was made before"""
+    if kwargs.get("temperature", 1.0) > MAX_CACHED_TEMPERATURE:
+        return await client.chat.completions.create(**kwargs)
+
+    key = cache_key(**kwargs)
+    cached = cache.get(key)
+    if cached is not None:
+        return ChatCompletion.model_validate(orjson.loads(cached))
+
+    response = await client.chat.completions.create(**kwargs)
+    cache.set(key, orjson.dumps(response.model_dump()))  # Stored as JSON bytes, not pickled
+    return response
+
+async def cached_stream(client: AsyncOpenAI, **kwargs) -> AsyncIterator[str]:
+    """Streamed completion yielding text tokens as they arrive; a cache hit yields the stored text at once"""
+    cacheable = kwargs.get("temperature", 1.0) <= MAX_CACHED_TEMPERATURE
+    key = cache_key(stream=True, **kwargs)
+    if cacheable:
+        cached = cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+    buf = []
+    stream = await client.chat.completions.create(stream=True, **kwargs)
+    async for chunk in stream:
+        if not chunk.choices:
+            continue
+        token = chunk.choices[0].delta.content or ""
+        buf.append(token)
+        yield token
+
+    if cacheable:
+        cache.set(key, "".join(buf))
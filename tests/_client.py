@@ -0,0 +1,136 @@
+"""
+Shared OpenRouter client for the test scripts
+
+One pooled connection set is reused across every call a script makes,
+instead of each file building its own client and paying for fresh TLS handshakes.
+Requests go out through aiohttp, which keeps parallel fan-outs (asyncio.gather over
+several models) truly concurrent where the default httpx transport serializes poorly.
+"""
+import asyncio
+import os
+import sys
+from contextlib import contextmanager
+
+import aiohttp
+import httpx
+from aiolimiter import AsyncLimiter
+from dotenv import load_dotenv
+from openai import AsyncOpenAI
+
+try:
+    import uvloop  # libuv event loop - not available on Windows
+except ImportError:
+    uvloop = None
+
+load_dotenv()
+
+class AiohttpResponseStream(httpx.AsyncByteStream):
+    """Response body read from aiohttp in chunks, so streamed completions still arrive incrementally"""
+
+    def __init__(self, response: aiohttp.ClientResponse, request: httpx.Request):
+        self._response = response
+        self._request = request
+
+    async def __aiter__(self):
+        # Body reads can fail too (sock_read timeout, dropped connection) - map them like handle_async_request does
+        try:
+            async for chunk in self._response.content.iter_chunked(64 * 1024):
+                yield chunk
+        except asyncio.TimeoutError as e:
+            raise httpx.ReadTimeout(str(e), request=self._request) from e
+        except aiohttp.ClientError as e:
+            raise httpx.ReadError(str(e), request=self._request) from e
+
+    async def aclose(self):
+        self._response.release()
+
+class AioHttpTransport(httpx.AsyncBaseTransport):
+    """httpx transport that sends requests through one aiohttp session"""
+
+    def __init__(self, max_connections: int = 100):
+        self.max_connections = max_connections
+        self._session = None  # Created on first request, inside the running event loop
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                # ttl_dns_cache=None: resolve openrouter.ai once per process, then reuse the address
+                connector=aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=None),
+                auto_decompress=False  # httpx decodes using the Content-Encoding header
+            )
+
+        timeout = request.extensions.get("timeout", {})
+        try:
+            response = await self._session.request(
+                request.method,
+                str(request.url),
+                headers=dict(request.headers),
+                data=await request.aread(),
+                allow_redirects=False,
+                timeout=aiohttp.ClientTimeout(sock_connect=timeout.get("connect"), sock_read=timeout.get("read"))
+            )
+        except asyncio.TimeoutError as e:
+            raise httpx.ReadTimeout(str(e), request=request) from e
+        except aiohttp.ClientError as e:
+            raise httpx.ConnectError(str(e), request=request) from e
+
+        return httpx.Response(
+            status_code=response.status,
+            headers=[(k.decode("latin-1"), v.decode("latin-1")) for k, v in response.raw_headers],
+            stream=AiohttpResponseStream(response, request),
+            request=request
+        )
+
+    async def aclose(self):
+        if self._session is not None:
+            await self._session.close()
+
+def build_transport() -> httpx.AsyncBaseTransport:
+    """aiohttp by default; TEST_HTTP2=1 multiplexes every call over one HTTP/2 connection instead (aiohttp is HTTP/1.1 only)"""
+    if os.getenv("TEST_HTTP2"):
+        return httpx.AsyncHTTPTransport(http2=True, limits=httpx.Limits(max_connections=100))
+    return AioHttpTransport(max_connections=100)
+
+client = AsyncOpenAI(
+    base_url="https://openrouter.ai/api/v1",
+    api_key=os.getenv("OPENROUTER_API_KEY", ""),  # Missing key fails per request (pytest skips) instead of at import
+    http_client=httpx.AsyncClient(transport=build_transport())
+)
+
+# Shared by every script's parallel calls: bursts go straight through, sustained load waits for budget
+LIMITER = AsyncLimiter(max_rate=20, time_period=60)
+
+PROBE_TIMEOUT = 30.0  # Seconds one availability probe may take before the model counts as down
+
+async def probe(client: AsyncOpenAI, **kwargs):
+    """One rate-limited completion with a hard timeout and no retries, for checking that a model answers"""
+    async with LIMITER:
+        return await client.with_options(timeout=PROBE_TIMEOUT, max_retries=0).chat.completions.create(**kwargs)
+
+@contextmanager
+def buffered_output():
+    """Yield a say(line) that collects a report, written as one block on exit so parallel probes never interleave"""
+    lines = []
+    try:
+        yield lines.append
+    finally:
+        sys.stdout.write("".join(f"{line}\n" for line in lines))
+
+def system_message(content: str) -> dict:
+    """System message marked as a cacheable prompt prefix (same shape as main.build_system_message)"""
+    return {
+        "role": "system",
+        "content": [{"type": "text", "text": content, "cache_control": {"type": "ephemeral"}}]
+    }
+
+def run(coro):
+    """Run a test entry point on uvloop when installed, closing the shared client before the loop shuts down"""
+    async def runner():
+        try:
+            return await coro
+        finally:
+            await client.close()
+
+    if uvloop is not None:
+        return uvloop.run(runner())
+    return asyncio.run(runner())
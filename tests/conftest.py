@@ -0,0 +1,32 @@
+"""
+Shared pytest setup for the test scripts
+
+.env is read once per session here, before any test module (or _client) is imported.
+The scripts can still be run directly with python; pytest calls their main() through
+the test_* wrappers with the session-wide client below.
+"""
+import asyncio
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import pytest
+import pytest_asyncio
+
+from _client import client, uvloop
+
+def pytest_asyncio_loop_factories(config, item):
+    """Run the session loop on uvloop when installed, like _client.run() does for direct script runs"""
+    if uvloop is not None:
+        return {"uvloop": uvloop.new_event_loop}
+    return {"asyncio": asyncio.new_event_loop}
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def openai_client():
+    """The shared OpenRouter client, closed once every test has finished"""
+    if not os.getenv("OPENROUTER_API_KEY"):
+        pytest.skip("OPENROUTER_API_KEY not set")
+    yield client
+    await client.close()
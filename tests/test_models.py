@@ -3,10 +3,11 @@ Simple test script to verify OpenRouter models work
 """
 import asyncio
 import os
-from dotenv import load_dotenv
-from openai import AsyncOpenAI
 
-load_dotenv()
+import pytest
+from openai import APITimeoutError, AsyncOpenAI
+
+from _client import buffered_output, client, probe, run
 
 # Models to test based on research
 TEST_MODELS = [
@@ -17,44 +18,43 @@ TEST_MODELS = [
     "deepseek/deepseek-chat"
 ]
 
-async def test_model(client: AsyncOpenAI, model: str) -> dict:
+async def check_model(client: AsyncOpenAI, model: str) -> dict:
     """Test a single model with a simple prompt"""
-    print(f"\n🧪 Testing {model}...")
+    with buffered_output() as say:
+        say(f"\n🧪 Testing {model}...")
 
-    try:
-        response = await asyncio.wait_for(
-            client.chat.completions.create(
+        try:
+            response = await probe(
+                client,
                 model=model,
                 messages=[{"role": "user", "content": "Say 'Hello, I am working!' in one sentence."}],
                 max_tokens=50
-            ),
-            timeout=30.0
-        )
-
-        result = response.choices[0].message.content
-        tokens = response.usage.total_tokens if response.usage else 0
-
-        print(f"✅ {model} - SUCCESS")
-        print(f"   Response: {result}")
-        print(f"   Tokens: {tokens}")
-
-        return {
-            "model": model,
-            "status": "success",
-            "response": result,
-            "tokens": tokens
-        }
-
-    except asyncio.TimeoutError:
-        print(f"❌ {model} - TIMEOUT (>30s)")
-        return {"model": model, "status": "timeout", "error": "Timeout after 30s"}
-
-    except Exception as e:
-        error_msg = str(e)
-        print(f"❌ {model} - ERROR: {error_msg}")
-        return {"model": model, "status": "error", "error": error_msg}
-
-async def main():
+            )
+
+            result = response.choices[0].message.content
+            tokens = response.usage.total_tokens if response.usage else 0
+
+            say(f"✅ {model} - SUCCESS")
+            say(f"   Response: {result}")
+            say(f"   Tokens: {tokens}")
+
+            return {
+                "model": model,
+                "status": "success",
+                "response": result,
+                "tokens": tokens
+            }
+
+        except APITimeoutError:
+            say(f"❌ {model} - TIMEOUT (>30s)")
+            return {"model": model, "status": "timeout", "error": "Timeout after 30s"}
+
+        except Exception as e:
+            error_msg = str(e)
+            say(f"❌ {model} - ERROR: {error_msg}")
+            return {"model": model, "status": "error", "error": error_msg}
+
+async def main(client: AsyncOpenAI) -> bool:
     """Test all models"""
 
     api_key = os.getenv("OPENROUTER_API_KEY")
@@ -63,18 +63,13 @@ async def main():
         print("❌ ERROR: OPENROUTER_API_KEY not found in .env file")
         print("\nPlease add your API key to .env:")
         print("OPENROUTER_API_KEY=your_key_here")
-        return
+        return False
 
     print("🚀 Testing OpenRouter Models")
     print(f"   API Key: {api_key[:20]}..." if len(api_key) > 20 else "   API Key found")
 
-    client = AsyncOpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=api_key
-    )
-
     # Test all models in parallel
-    tasks = [test_model(client, model) for model in TEST_MODELS]
+    tasks = [check_model(client, model) for model in TEST_MODELS]
     results = await asyncio.gather(*tasks)
 
     # Summary
@@ -101,5 +96,11 @@ async def main():
     else:
         print("⚠️  Not enough models working. Check your API key and credits.")
 
+    return len(successful) >= 3
+
+@pytest.mark.asyncio
+async def test_models(openai_client):
+    assert await main(openai_client)
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    run(main(client))
@@ -1,12 +1,15 @@
 """
 Test Grok and find a 5th model
 """
+import argparse
 import asyncio
 import os
-from dotenv import load_dotenv
+from typing import Optional
+
+import pytest
 from openai import AsyncOpenAI
 
-load_dotenv()
+from _client import buffered_output, client, probe, run
 
 # Models to test
 TEST_MODELS = [
@@ -16,49 +19,65 @@ TEST_MODELS = [
     "mistralai/mistral-large",  # Mistral's best
 ]
 
-async def test_model(client: AsyncOpenAI, model: str) -> dict:
+async def check_model(client: AsyncOpenAI, model: str) -> dict:
     """Test a single model"""
-    print(f"\n🧪 Testing {model}...")
+    with buffered_output() as say:
+        say(f"\n🧪 Testing {model}...")
 
-    try:
-        response = await asyncio.wait_for(
-            client.chat.completions.create(
+        try:
+            response = await probe(
+                client,
                 model=model,
                 messages=[{"role": "user", "content": "Say 'Hello, I work!' in one sentence."}],
                 max_tokens=50
-            ),
-            timeout=30.0
-        )
+            )
 
-        result = response.choices[0].message.content
-        tokens = response.usage.total_tokens if response.usage else 0
+            result = response.choices[0].message.content
+            tokens = response.usage.total_tokens if response.usage else 0
 
-        print(f"✅ {model} - SUCCESS")
-        print(f"   Response: {result}")
-        print(f"   Tokens: {tokens}")
+            say(f"✅ {model} - SUCCESS")
+            say(f"   Response: {result}")
+            say(f"   Tokens: {tokens}")
 
-        return {"model": model, "status": "success", "response": result, "tokens": tokens}
+            return {"model": model, "status": "success", "response": result, "tokens": tokens}
 
+        except Exception as e:
+            error_msg = str(e)
+            say(f"❌ {model} - ERROR: {error_msg}")
+            return {"model": model, "status": "error", "error": error_msg}
+
+async def find_working_model(client: AsyncOpenAI) -> Optional[str]:
+    """One request with TEST_MODELS as OpenRouter's fallback list; returns the model that answered"""
+    print(f"\n🧪 Trying {len(TEST_MODELS)} models in fallback order...")
+
+    try:
+        response = await client.with_options(timeout=30.0, max_retries=0).chat.completions.create(
+            model=TEST_MODELS[0],
+            extra_body={"models": TEST_MODELS},  # OpenRouter moves on to the next model if one fails
+            messages=[{"role": "user", "content": "Say 'Hello, I work!' in one sentence."}],
+            max_tokens=50
+        )
     except Exception as e:
-        error_msg = str(e)
-        print(f"❌ {model} - ERROR: {error_msg}")
-        return {"model": model, "status": "error", "error": error_msg}
+        print(f"❌ No model answered - ERROR: {e}")
+        return None
+
+    print(f"✅ {response.model} - SUCCESS")
+    print(f"   Response: {response.choices[0].message.content}")
+    return response.model
 
-async def main():
+async def main(client: AsyncOpenAI, verify_all: bool = False) -> bool:
     api_key = os.getenv("OPENROUTER_API_KEY")
 
     if not api_key:
         print("❌ ERROR: OPENROUTER_API_KEY not found")
-        return
-
-    client = AsyncOpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=api_key
-    )
+        return False
 
     print("🚀 Testing New Models for 5-Model Setup")
 
-    tasks = [test_model(client, model) for model in TEST_MODELS]
+    if not verify_all:
+        return await find_working_model(client) is not None
+
+    tasks = [check_model(client, model) for model in TEST_MODELS]
     results = await asyncio.gather(*tasks)
 
     print("\n" + "="*60)
@@ -71,5 +90,14 @@ async def main():
     for r in successful:
         print(f"   - {r['model']}")
 
+    return bool(successful)
+
+@pytest.mark.asyncio
+async def test_new_models(openai_client):
+    assert await main(openai_client)
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Find a working model among TEST_MODELS")
+    parser.add_argument("--verify-all", action="store_true", help="probe every model separately instead of one fallback request")
+    args = parser.parse_args()
+    run(main(client, verify_all=args.verify_all))
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Prompt optimization tests - every optimizer variant in one process
+
+Variants:
+    basic           original instructions, date given in the prompt
+    comprehensive   current events vs. historical queries, classified locally (no :online)
+    final           date from the system clock, no web search
+
+Usage:
+    python tests/test_optimize_all.py                 # all variants
+    python tests/test_optimize_all.py final basic     # selected variants
+"""
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+
+import pytest
+
+from _cache import cached_create, cached_stream
+from _client import LIMITER, client, run, system_message
+from _prompts import (
+    CURRENT_USER_TEMPLATE, DATED_USER_TEMPLATE, HISTORICAL_USER_TEMPLATE, OPTIMIZE_BASIC, OPTIMIZE_COMPREHENSIVE,
+    OPTIMIZE_FINAL, USER_TEMPLATE, is_current_event
+)
+
+# Formatted once per run; the date only ever goes in the per-call user message, so the system prefix never changes
+TODAY = datetime.now().strftime("%B %d, %Y")
+
+SHUTDOWN_PROMPT = "top news about the us govenrment shutdown and the faa layoffs imapcting travel and how this decline will effect the stock prices of major airlines"
+
+# Format: {name: {"instructions": str, "model": str, "temperature": float, "dated": bool, "classify": bool, "prompts": [(label, prompt)]}}
+VARIANTS = {
+    "basic": {
+        "instructions": OPTIMIZE_BASIC,
+        "model": "anthropic/claude-3.5-haiku",
+        "temperature": 0,
+        "dated": True,
+        "prompts": [("CURRENT EVENT", SHUTDOWN_PROMPT)],
+    },
+    "comprehensive": {
+        "instructions": OPTIMIZE_COMPREHENSIVE,
+        "model": "anthropic/claude-3.5-haiku",
+        "temperature": 0.3,
+        "dated": False,
+        "classify": True,  # is_current_event() picks the template instead of an :online web search
+        "prompts": [
+            ("CURRENT EVENT", SHUTDOWN_PROMPT),
+            ("HISTORICAL QUERY", "what were the main causes of the 2008 financal crisis and how did it effect the housing market"),
+            ("CURRENT EVENT", "latest developemnts in the trump trial"),
+            ("HISTORICAL QUERY", "major battles of world war 2 in europe"),
+            ("MIXED QUERY", "compare the 2008 recession to todays economic situation"),
+        ],
+    },
+    "final": {
+        "instructions": OPTIMIZE_FINAL,
+        "model": "anthropic/claude-3.5-haiku",  # NO :online
+        "temperature": 0,
+        "dated": True,
+        "prompts": [("CURRENT EVENT", SHUTDOWN_PROMPT)],
+    },
+}
+
+def build_request(variant: dict, prompt: str) -> dict:
+    """Completion kwargs for one prompt: static instructions first, per-call message last"""
+    if variant.get("classify"):
+        template = CURRENT_USER_TEMPLATE if is_current_event(prompt) else HISTORICAL_USER_TEMPLATE
+        user_message = template.format(today=TODAY, prompt=prompt)
+    elif variant["dated"]:
+        user_message = DATED_USER_TEMPLATE.format(today=TODAY, prompt=prompt)
+    else:
+        user_message = USER_TEMPLATE.format(prompt=prompt)
+
+    return {
+        "model": variant["model"],
+        "messages": [system_message(variant["instructions"]), {"role": "user", "content": user_message}],
+        "max_tokens": 250,
+        "temperature": variant["temperature"],
+    }
+
+def check_date(optimized: str):
+    """Report whether the optimizer used the injected system date"""
+    if TODAY in optimized:
+        print(f"\n✅ SUCCESS: Uses correct system date ({TODAY})")
+    elif "as of today" in optimized.lower():
+        print("\n✅ ACCEPTABLE: Uses 'as of today' (lets research models determine date)")
+    else:
+        print(f"\n⚠️  WARNING: Expected date '{TODAY}' not found in output")
+
+async def stream_prompt(client, request: dict) -> str:
+    """Single prompt: print tokens as they arrive"""
+    print("✅ OPTIMIZED PROMPT:")
+    buf = []
+    async for token in cached_stream(client, **request):
+        print(token, end="", flush=True)
+        buf.append(token)
+    print()
+    return "".join(buf).strip()
+
+async def optimize_prompt(client, label: str, prompt: str, request: dict) -> bool:
+    """One of several parallel prompts: print the whole result as one block once it finishes"""
+    try:
+        async with LIMITER:
+            response = await cached_create(client, **request)
+        outcome = f"\n✅ OPTIMIZED:\n{response.choices[0].message.content.strip()}"
+        success = True
+    except Exception as e:
+        outcome = f"\n❌ ERROR: {e}"
+        success = False
+
+    # One write per prompt, so parallel results never interleave
+    sys.stdout.write(f"\n{'='*80}\nTEST: {label}\n{'='*80}\n📝 ORIGINAL: {prompt}\n{outcome}\n")
+
+    return success
+
+async def run_variant(client, name: str) -> bool:
+    """Optimize every prompt of one variant; True if all calls succeeded"""
+    variant = VARIANTS[name]
+    prompts = variant["prompts"]
+
+    print("=" * 80)
+    print(f"OPTIMIZATION TEST: {name} ({variant['model']})")
+    print("=" * 80)
+    if variant["dated"]:
+        print(f"\n📅 System date: {TODAY}")
+
+    if len(prompts) > 1:
+        print(f"\n⏳ Optimizing {len(prompts)} prompts...")
+        results = await asyncio.gather(*[
+            optimize_prompt(client, label, prompt, build_request(variant, prompt)) for label, prompt in prompts
+        ])
+        print(f"\nRESULTS: {sum(results)}/{len(results)} prompts optimized")
+        return all(results)
+
+    prompt = prompts[0][1]
+    print(f'\n📝 ORIGINAL PROMPT:\n"{prompt}"\n')
+    try:
+        optimized = await stream_prompt(client, build_request(variant, prompt))
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        return False
+
+    if variant["dated"]:
+        check_date(optimized)
+    return True
+
+async def main(client, names) -> bool:
+    results = [await run_variant(client, name) for name in names]
+    return all(results)
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", list(VARIANTS))
+async def test_optimize(openai_client, name):
+    assert await run_variant(openai_client, name)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the prompt optimization variants")
+    parser.add_argument("names", nargs="*", choices=list(VARIANTS), default=list(VARIANTS), metavar="variant")
+    args = parser.parse_args()
+    success = run(main(client, args.names))
+    exit(0 if success else 1)
@@ -1,17 +1,25 @@
-"""Test that :online suffix enables web search"""
+"""Test that :online suffix enables web search
+
+Makes a single chat completion, so it posts straight to OpenRouter with aiohttp
+instead of importing the openai SDK through _client.
+"""
 import asyncio
 import os
+
+import aiohttp
+import pytest
 from dotenv import load_dotenv
-from openai import AsyncOpenAI
+
+try:
+    import uvloop  # libuv event loop - not available on Windows
+except ImportError:
+    uvloop = None
 
 load_dotenv()
 
-async def test_web_search():
-    client = AsyncOpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=os.getenv("OPENROUTER_API_KEY")
-    )
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
 
+async def main() -> bool:
     print("🧪 Testing web search with :online models...")
     print("Query: 'What is today's date and top news story?'\n")
 
@@ -19,16 +27,20 @@ async def test_web_search():
     model = "openai/gpt-4o:online"
 
     try:
-        response = await asyncio.wait_for(
-            client.chat.completions.create(
-                model=model,
-                messages=[{"role": "user", "content": "What is today's date and what is the top news story today? Be specific about the date."}],
-                max_tokens=500
-            ),
-            timeout=45.0
-        )
+        async with aiohttp.ClientSession(
+            headers={"Authorization": f"Bearer {os.getenv('OPENROUTER_API_KEY', '')}"},
+            timeout=aiohttp.ClientTimeout(total=45.0)
+        ) as session:
+            async with session.post(OPENROUTER_URL, json={
+                "model": model,
+                "messages": [{"role": "user", "content": "What is today's date and what is the top news story today? Be specific about the date."}],
+                "max_tokens": 500
+            }) as response:
+                data = await response.json()
+                if response.status != 200:
+                    raise RuntimeError(f"HTTP {response.status}: {data.get('error', data)}")
 
-        result = response.choices[0].message.content
+        result = data["choices"][0]["message"]["content"]
 
         print(f"✅ {model}")
         print(f"\nResponse:\n{result}\n")
@@ -41,5 +53,18 @@ async def test_web_search():
 
     except Exception as e:
         print(f"❌ ERROR: {str(e)}")
+        return False
+
+    return True
+
+@pytest.mark.asyncio
+async def test_web_search():
+    if not os.getenv("OPENROUTER_API_KEY"):
+        pytest.skip("OPENROUTER_API_KEY not set")
+    assert await main()
 
-asyncio.run(test_web_search())
+if __name__ == "__main__":
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())